@@ -1,7 +1,10 @@
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, fields
 from datetime import datetime, timezone
 from typing import Optional
+import atexit
 import json
+import queue
+import threading
 
 @dataclass
 class PriceAlert:
@@ -32,17 +35,35 @@ class SentimentAlert:
     sample_titles: list
     ts: float
 
+# Alerts are formatted and printed on a background thread so emit() never blocks
+_Q = queue.SimpleQueue()
+
+def _print_worker():
+    while True:
+        payload = _Q.get()
+        if payload is None:
+            break
+        print("\n" + "="*70 + "\n" + json.dumps(payload, indent=2) + "\n" + "="*70 + "\n")
+
+_worker = threading.Thread(target=_print_worker, name="alert-printer", daemon=True)
+_worker.start()
+
+@atexit.register
+def _flush():
+    """Print any queued alerts before the interpreter exits."""
+    _Q.put(None)
+    _worker.join(timeout=2)
+
 def emit(alert):
     """
     Emit alert in JSON format.
     Currently prints to console; extend to publish to SNS/webhook for Alexa.
     """
-    payload = asdict(alert)
+    # Alerts are flat dataclasses, so skip asdict's recursive deep copy
+    payload = {f.name: getattr(alert, f.name) for f in fields(alert)}
     payload["iso_time"] = datetime.now(timezone.utc).isoformat()
     
-    print("\n" + "="*70)
-    print(json.dumps(payload, indent=2))
-    print("="*70 + "\n")
+    _Q.put(payload)
     
     # TODO: Add webhook/SNS publishing for Alexa skill integration
     # publish_to_alexa(payload)
@@ -1,17 +1,30 @@
 """
 Simple Flask server for Alexa to query latest analysis.
 """
-from flask import Flask, jsonify, request
+from flask import Flask, Response, request
 from alexa_queries import get_news_summary, get_buy_sell_recommendation
-import json
+from cachetools import LRUCache, cached
+import orjson
 import os
+import threading
 
 app = Flask(__name__)
 
+ANALYSIS_FILE = 'latest_analysis.json'
+
 def load_latest_analysis():
-    """Load the latest analysis from JSON file."""
-    with open('latest_analysis.json', 'r') as f:
-        return json.load(f).get('symbols', {})
+    """Load the latest analysis from JSON file (cached until the file changes)."""
+    return _read_analysis(os.stat(ANALYSIS_FILE).st_mtime_ns)
+
+# Keyed by mtime, so only the newest parse is kept
+@cached(LRUCache(maxsize=1), lock=threading.Lock())
+def _read_analysis(mtime_ns: int) -> dict:
+    with open(ANALYSIS_FILE, 'rb') as f:
+        return orjson.loads(f.read()).get('symbols', {})
+
+def json_response(obj) -> Response:
+    """Serialize with orjson instead of Flask's stdlib-json jsonify."""
+    return Response(orjson.dumps(obj), mimetype='application/json')
 
 @app.route('/alexa/news/<symbol>', methods=['GET'])
 def alexa_news(symbol):
@@ -19,7 +32,7 @@ def alexa_news(symbol):
     symbol = symbol.upper()
     analysis = load_latest_analysis()
     response = get_news_summary(symbol, analysis)
-    return jsonify({"speech": response})
+    return json_response({"speech": response})
 
 @app.route('/alexa/recommendation/<symbol>', methods=['GET'])
 def alexa_recommendation(symbol):
@@ -27,7 +40,7 @@ def alexa_recommendation(symbol):
     symbol = symbol.upper()
     analysis = load_latest_analysis()
     response = get_buy_sell_recommendation(symbol, analysis)
-    return jsonify({"speech": response})
+    return json_response({"speech": response})
 
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000)
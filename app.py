@@ -1,13 +1,12 @@
 import os
 import time
 import asyncio
-import schedule
 from datetime import datetime, timezone, timedelta
 from dotenv import load_dotenv
 
 import torch
-from sentiment import load_finbert, analyze
-from data_sources import get_prices, get_news, get_reddit
+from sentiment import get_finbert, summarize_scores, DynamicBatcher
+from data_sources import get_prices, get_news, get_reddit, close_clients
 from alert_bus import emit, PriceAlert, SentimentAlert
 from chat_sambanova import say_from_facts
 from export_data import export_to_json
@@ -24,6 +23,9 @@ SELL_THRESH = float(os.getenv("SELL_THRESH", 0.35))
 COOLDOWN_MIN = float(os.getenv("COOLDOWN_MIN", 1))
 POLL_SECONDS = int(os.getenv("POLL_SECONDS", 15))
 PRICE_CALC_MODE = os.getenv("PRICE_CALC_MODE", "day_to_day")
+TORCH_COMPILE = os.getenv("TORCH_COMPILE", "false").lower() == "true"
+FINBERT_JIT = os.getenv("FINBERT_JIT", "false").lower() == "true"
+SCORE_MODE = os.getenv("SCORE_MODE", "prob")  # "logit" skips the softmax; retune BUY/SELL_THRESH
 
 # ---------------------------------------------------------------------
 # INITIALIZE FINBERT
@@ -31,9 +33,18 @@ PRICE_CALC_MODE = os.getenv("PRICE_CALC_MODE", "day_to_day")
 device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 print(f"🔧 Using device: {device}")
 
-tok, mdl, idx_pos, idx_neg = load_finbert(device=device)
+# Loaded in fp16 on CUDA; sign/threshold decisions are unaffected
+tok, mdl, idx_pos, idx_neg = get_finbert(device=device, jit=FINBERT_JIT)
+
+# Opt-in: first calls pay the compile cost for each new input shape
+if TORCH_COMPILE and not FINBERT_JIT:
+    mdl = torch.compile(mdl, mode="reduce-overhead", fullgraph=False)
+
 print("✅ FinBERT loaded and ready\n")
 
+# One batching thread owns the model; the event loop just awaits its results
+SCORER = DynamicBatcher(tok, mdl, idx_pos, idx_neg, device, logit_score=SCORE_MODE == "logit")
+
 # ---------------------------------------------------------------------
 # ALERT TRACKING WITH BASELINE PRICES
 # ---------------------------------------------------------------------
@@ -61,18 +72,34 @@ def should_alert_price(symbol: str, change_pct: float, threshold: float) -> bool
 # ---------------------------------------------------------------------
 # SENTIMENT + DATA ANALYSIS
 # ---------------------------------------------------------------------
-async def analyze_symbol(symbol: str):
-    """Fetch news & Reddit concurrently, then run FinBERT sentiment analysis."""
-    news_task = asyncio.create_task(get_news(symbol))
-    reddit_task = asyncio.create_task(get_reddit(symbol))
-    news_titles, reddit_texts = await asyncio.gather(news_task, reddit_task)
-
-    result = analyze(
-        symbol, news_titles, reddit_texts,
-        tok, mdl, idx_pos, idx_neg,
-        buy=BUY_THRESH, sell=SELL_THRESH, device=device
-    )
-    return result, news_titles, reddit_texts
+async def fetch_texts(symbol: str):
+    """Fetch news & Reddit for one symbol concurrently."""
+    news_titles, reddit_texts = await asyncio.gather(get_news(symbol), get_reddit(symbol))
+    return news_titles, reddit_texts
+
+async def analyze_all(texts_by_symbol: dict) -> dict:
+    """
+    Score every symbol's texts in one batched FinBERT pass, then split
+    the scores back per symbol. Returns {symbol: result or None}.
+    """
+    all_texts = []
+    for news_titles, reddit_texts in texts_by_symbol.values():
+        all_texts.extend(news_titles)
+        all_texts.extend(reddit_texts)
+
+    scores = await asyncio.wrap_future(SCORER.submit(all_texts))
+
+    results = {}
+    offset = 0
+    for symbol, (news_titles, reddit_texts) in texts_by_symbol.items():
+        mid = offset + len(news_titles)
+        end = mid + len(reddit_texts)
+        results[symbol] = summarize_scores(
+            news_titles, reddit_texts, scores[offset:mid], scores[mid:end],
+            buy=BUY_THRESH, sell=SELL_THRESH
+        )
+        offset = end
+    return results
 
 # ---------------------------------------------------------------------
 # MONITORING LOOP
@@ -114,10 +141,12 @@ async def run_cycle_async():
             print(f"  🔔 Price alert! New baseline: ${current_price:.2f}")
 
     # ----- SENTIMENT ANALYSIS (SILENT) -----
-    results = await asyncio.gather(*[analyze_symbol(symbol) for symbol in WATCH])
+    # Fetch everything first, then run FinBERT once for all symbols (off the event loop)
+    fetched = await asyncio.gather(*[fetch_texts(symbol) for symbol in WATCH])
+    results = await analyze_all(dict(zip(WATCH, fetched)))
 
-    for i, symbol in enumerate(WATCH):
-        result, news_titles, reddit_texts = results[i]
+    for symbol in WATCH:
+        result = results.get(symbol)
         if not result:
             continue
 
@@ -147,15 +176,18 @@ async def run_cycle_async():
 # ---------------------------------------------------------------------
 # SCHEDULER
 # ---------------------------------------------------------------------
-def run_cycle():
-    asyncio.run(run_cycle_async())
-
-def run_loop():
-    run_cycle()
-    schedule.every(POLL_SECONDS).seconds.do(run_cycle)
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
+async def main_loop():
+    """
+    Run a cycle every POLL_SECONDS on one long-lived event loop,
+    so pooled HTTP/Reddit connections survive between cycles.
+    """
+    try:
+        while True:
+            await run_cycle_async()
+            await asyncio.sleep(POLL_SECONDS)
+    finally:
+        # Also runs when Ctrl+C cancels the loop
+        await close_clients()
 
 # ---------------------------------------------------------------------
 # MAIN ENTRY POINT
@@ -171,6 +203,6 @@ if __name__ == "__main__":
     print("=" * 70 + "\n")
 
     try:
-        run_loop()
+        asyncio.run(main_loop())
     except KeyboardInterrupt:
         print("\n👋 Shutting down FinGalaxy...")
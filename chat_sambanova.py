@@ -1,5 +1,10 @@
 # chat_sambanova.py
 import os
+import json
+import hashlib
+import threading
+from collections import ChainMap
+from cachetools import TTLCache
 from sambanova import SambaNova
 
 # Lazy client singleton
@@ -28,6 +33,73 @@ SYSTEM_PROMPT = (
     "Be friendly and helpful like a knowledgeable friend."
 )
 
+FACTS_TEMPERATURE = float(os.getenv("SAMBA_FACTS_TEMPERATURE", 0.3))  # Sampling temperature for say_from_facts
+
+# Exact-match response cache for say_from_facts (same facts + prompt + model).
+# Only used at or below _CACHE_MAX_TEMPERATURE, where one reply stands in for
+# another; raising SAMBA_FACTS_TEMPERATURE above it turns the cache off.
+_CACHE_MAX_TEMPERATURE = 0.3
+_CACHE_ENABLED = os.getenv("SAMBA_CACHE", "true").lower() == "true"
+_CACHE_TTL = float(os.getenv("SAMBA_CACHE_TTL", 300))
+_CACHE_SIZE = int(os.getenv("SAMBA_CACHE_SIZE", 1024))
+_response_cache = TTLCache(maxsize=_CACHE_SIZE, ttl=_CACHE_TTL)
+_cache_lock = threading.Lock()
+
+def _facts_key(facts: dict, user_prompt: str, model_name: str) -> str:
+    """Stable hash of the request; floats are rounded so tiny price jitter still hits."""
+    rounded = {k: round(v, 2) if isinstance(v, float) else v for k, v in facts.items()}
+    payload = json.dumps({"facts": rounded, "prompt": user_prompt, "model": model_name},
+                         sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def clear_response_cache():
+    """Drop all cached say_from_facts responses."""
+    with _cache_lock:
+        _response_cache.clear()
+
+# Facts block for say_from_facts; missing keys fall back to _FACTS_DEFAULTS
+_FACTS_TMPL = """
+Available data for {symbol}:
+- Current Price: ${price}
+- Change from baseline: {change_pct:.2f}%
+- Sentiment Decision: {decision}
+- Confidence Level: {confidence_pct}%
+- News Articles Analyzed: {news_count}
+- Reddit Posts Analyzed: {reddit_count}
+- Positive Mentions: {positive}
+- Negative Mentions: {negative}
+- Average Sentiment Score: {avg_sentiment:.3f}
+- Top News Topics: {top_news_topics}
+- Top Reddit Topics: {top_reddit_topics}
+- Latest Headline: {sample_title}
+"""
+
+_FACTS_DEFAULTS = {
+    "symbol": "this stock",
+    "price": "N/A",
+    "change_pct": 0,
+    "decision": "N/A",
+    "confidence_pct": "N/A",
+    "news_count": 0,
+    "reddit_count": 0,
+    "positive": 0,
+    "negative": 0,
+    "avg_sentiment": 0,
+    "sample_title": "none",
+}
+
+def _top_topics(topics) -> str:
+    return ', '.join(list(topics)[:3]) if topics else 'none'
+
+def _extract_text(response):
+    """Pull the reply text out of a chat completion, or None if the format is unexpected."""
+    message = response.choices[0].message
+    if isinstance(message.content, list):
+        return message.content[0].get("text", "").strip()
+    elif isinstance(message.content, str):
+        return message.content.strip()
+    return None
+
 def say_from_facts(facts: dict, user_prompt: str) -> str:
     """
     Use SambaNova API to have a conversation grounded in facts.
@@ -40,22 +112,19 @@ def say_from_facts(facts: dict, user_prompt: str) -> str:
     try:
         model_name = os.getenv("SAMBA_MODEL", "Llama-4-Maverick-17B-128E-Instruct")
 
+        use_cache = _CACHE_ENABLED and FACTS_TEMPERATURE <= _CACHE_MAX_TEMPERATURE
+        if use_cache:
+            key = _facts_key(facts, user_prompt, model_name)
+            with _cache_lock:
+                cached = _response_cache.get(key)
+            if cached is not None:
+                return cached
+
         # Format facts in a natural way for the LLM
-        facts_text = f"""
-Available data for {facts.get('symbol', 'this stock')}:
-- Current Price: ${facts.get('price', 'N/A')}
-- Change from baseline: {facts.get('change_pct', 0):.2f}%
-- Sentiment Decision: {facts.get('decision', 'N/A')}
-- Confidence Level: {facts.get('confidence_pct', 'N/A')}%
-- News Articles Analyzed: {facts.get('news_count', 0)}
-- Reddit Posts Analyzed: {facts.get('reddit_count', 0)}
-- Positive Mentions: {facts.get('positive', 0)}
-- Negative Mentions: {facts.get('negative', 0)}
-- Average Sentiment Score: {facts.get('avg_sentiment', 0):.3f}
-- Top News Topics: {', '.join(list(facts.get('news_topics', {}).keys())[:3]) if facts.get('news_topics') else 'none'}
-- Top Reddit Topics: {', '.join(list(facts.get('reddit_topics', {}).keys())[:3]) if facts.get('reddit_topics') else 'none'}
-- Latest Headline: {facts.get('sample_title', 'none')}
-"""
+        facts_text = _FACTS_TMPL.format_map(ChainMap({
+            "top_news_topics": _top_topics(facts.get('news_topics')),
+            "top_reddit_topics": _top_topics(facts.get('reddit_topics')),
+        }, facts, _FACTS_DEFAULTS))
 
         messages = [
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -65,19 +134,20 @@ Available data for {facts.get('symbol', 'this stock')}:
         response = client.chat.completions.create(
             model=model_name,
             messages=messages,
-            temperature=0.3,  # Slightly higher for more natural conversation
+            temperature=FACTS_TEMPERATURE,
             top_p=0.9,
             max_tokens=150  # Allow longer conversational responses
         )
 
-        message = response.choices[0].message
-        if isinstance(message.content, list):
-            return message.content[0].get("text", "").strip()
-        elif isinstance(message.content, str):
-            return message.content.strip()
-        else:
+        text = _extract_text(response)
+        if text is None:
             return "[Unexpected response format]"
 
+        if use_cache and text:
+            with _cache_lock:
+                _response_cache[key] = text
+        return text
+
     except Exception as e:
         return f"[SambaNova error] {e}"
 
@@ -120,13 +190,8 @@ def have_conversation(conversation_history: list, latest_analysis: dict, user_me
             max_tokens=200
         )
 
-        message = response.choices[0].message
-        if isinstance(message.content, list):
-            return message.content[0].get("text", "").strip()
-        elif isinstance(message.content, str):
-            return message.content.strip()
-        else:
-            return "[Unexpected response format]"
+        text = _extract_text(response)
+        return text if text is not None else "[Unexpected response format]"
 
     except Exception as e:
         return f"[SambaNova error] {e}"
@@ -1,9 +1,14 @@
 import os
+import re
+import html
 import asyncio
 import httpx
 import yfinance as yf
+from cachetools import TTLCache
 from datetime import datetime, timezone
-import xml.etree.ElementTree as ET
+from importlib.util import find_spec
+from itertools import chain
+from typing import Optional
 import urllib.parse
 
 # Subreddits for crypto and stock discussion
@@ -20,6 +25,78 @@ ALIASES = {
 
 UA = {"User-Agent": "FinGalaxy/1.0"}
 
+# Only item titles are needed from the RSS feed, so skip building a DOM
+_ITEM_TITLE_RE = re.compile(rb"<item>.*?<title>(?:<!\[CDATA\[)?(.*?)(?:\]\]>)?</title>", re.S)
+
+# Short-lived price cache so back-to-back polls don't refetch from yfinance
+_PRICE_TTL = int(os.getenv("PRICE_TTL", 60))
+_PRICE_CACHE = TTLCache(maxsize=256, ttl=_PRICE_TTL)  # (symbol, intraday) -> entry
+
+# Long-lived clients reused across requests (keep-alive instead of a new TLS handshake per call)
+_HTTP: Optional[httpx.AsyncClient] = None
+_REDDIT = None
+_REDDIT_READY = False
+
+# Cap in-flight requests per host to stay under Reddit/Google rate limits.
+# Created alongside the client so they bind to the running event loop.
+REDDIT_CONCURRENCY = int(os.getenv("REDDIT_CONCURRENCY", 8))
+NEWS_CONCURRENCY = int(os.getenv("NEWS_CONCURRENCY", 8))
+MAX_RETRIES = 3
+_REDDIT_SEM: Optional[asyncio.Semaphore] = None
+_NEWS_SEM: Optional[asyncio.Semaphore] = None
+
+async def get_http() -> httpx.AsyncClient:
+    """Return the shared async HTTP client, creating it on first use."""
+    global _HTTP, _REDDIT_SEM, _NEWS_SEM
+    if _HTTP is None or _HTTP.is_closed:
+        _HTTP = httpx.AsyncClient(
+            http2=find_spec("h2") is not None,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=16),
+            timeout=10,
+        )
+        _REDDIT_SEM = asyncio.Semaphore(REDDIT_CONCURRENCY)
+        _NEWS_SEM = asyncio.Semaphore(NEWS_CONCURRENCY)
+    return _HTTP
+
+def _retry_delay(r: httpx.Response, attempt: int) -> float:
+    """Seconds to wait before retrying a 429, honoring Retry-After when numeric."""
+    try:
+        delay = float(r.headers.get("retry-after", ""))
+    except ValueError:
+        delay = 2 ** attempt
+    return min(max(delay, 0.0), 30.0)
+
+async def _get_with_retry(client: httpx.AsyncClient, sem: asyncio.Semaphore, url: str, **kwargs) -> httpx.Response:
+    """GET under a concurrency limit, backing off exponentially on 429."""
+    for attempt in range(MAX_RETRIES + 1):
+        async with sem:
+            r = await client.get(url, **kwargs)
+        if r.status_code != 429 or attempt == MAX_RETRIES:
+            return r
+        # Sleep outside the semaphore so other requests can proceed
+        await asyncio.sleep(_retry_delay(r, attempt))
+
+async def get_reddit_client():
+    """Return the shared Async PRAW client, or None if Reddit isn't configured."""
+    global _REDDIT, _REDDIT_READY
+    if not _REDDIT_READY:
+        _REDDIT = reddit_client()
+        _REDDIT_READY = True
+    return _REDDIT
+
+async def close_clients():
+    """Close the shared HTTP and Reddit clients. Call before the event loop exits."""
+    global _HTTP, _REDDIT, _REDDIT_READY, _REDDIT_SEM, _NEWS_SEM
+    if _HTTP is not None and not _HTTP.is_closed:
+        await _HTTP.aclose()
+    if _REDDIT is not None:
+        try:
+            await _REDDIT.close()
+        except Exception:
+            pass
+    _HTTP, _REDDIT, _REDDIT_READY = None, None, False
+    _REDDIT_SEM = _NEWS_SEM = None
+
 def now_utc():
     return datetime.now(timezone.utc).timestamp()
 
@@ -29,27 +106,17 @@ async def fetch_google_news(client: httpx.AsyncClient, query: str) -> list:
     titles = []
     
     try:
-        r = await client.get(url, headers=UA, timeout=10, follow_redirects=True)
+        r = await _get_with_retry(client, _NEWS_SEM, url, headers=UA, timeout=10, follow_redirects=True)
         if r.status_code != 200:
             return titles
             
-        # Handle empty responses
-        if not r.text or len(r.text.strip()) == 0:
-            return titles
-            
-        root = ET.fromstring(r.text)
-        
-        for item in root.findall(".//item")[:20]:
-            title = item.findtext("title")
-            if title and title.strip():
-                titles.append(title.strip())
-    except ET.ParseError:
-        # Silent fail - RSS sometimes returns empty/malformed content
-        pass
+        # Empty/malformed RSS simply yields no matches
+        for raw in _ITEM_TITLE_RE.findall(r.content)[:20]:
+            title = html.unescape(raw.decode("utf-8", "replace")).strip()
+            if title:
+                titles.append(title)
     except Exception as e:
-        # Only log unexpected errors
-        if "no element found" not in str(e).lower():
-            print(f"News fetch error for {query}: {e}")
+        print(f"News fetch error for {query}: {e}")
     
     return titles
 
@@ -59,23 +126,15 @@ async def get_news(symbol: str) -> list[str]:
     Deduplicates while preserving order.
     """
     queries = ALIASES.get(symbol, [symbol])
+    client = await get_http()
     
-    async with httpx.AsyncClient() as client:
-        results = await asyncio.gather(
-            *[fetch_google_news(client, q) for q in queries],
-            return_exceptions=True
-        )
+    results = await asyncio.gather(
+        *[fetch_google_news(client, q) for q in queries],
+        return_exceptions=True
+    )
     
     # Deduplicate while keeping order
-    seen = set()
-    output = []
-    
-    for result in results:
-        if isinstance(result, list):
-            for title in result:
-                if title not in seen:
-                    seen.add(title)
-                    output.append(title)
+    output = list(dict.fromkeys(chain.from_iterable(r for r in results if isinstance(r, list))))
     
     return output[:30]
 
@@ -106,75 +165,74 @@ def reddit_client():
         print(f"Reddit client init failed: {e}")
         return None
 
+async def _search_praw(rc, sub: str, query: str):
+    """Search one subreddit for one query via Async PRAW, yielding post texts."""
+    subreddit = await rc.subreddit(sub)
+    async for submission in subreddit.search(query, limit=15, sort="new"):
+        text = f"{submission.title} {submission.selftext or ''}".strip()
+        if text:
+            yield text
+
+async def _collect(agen, sem: asyncio.Semaphore) -> list:
+    """Drain an async generator into a list, holding sem for the whole search."""
+    async with sem:
+        return [item async for item in agen]
+
+async def _search_json(client: httpx.AsyncClient, sub: str, query: str) -> list:
+    """Search one subreddit for one query via the public JSON API."""
+    url = f"https://www.reddit.com/r/{sub}/search.json?q={query}&restrict_sr=1&sort=new&t=day&limit=20"
+    r = await _get_with_retry(client, _REDDIT_SEM, url, headers=UA, timeout=10)
+    if r.status_code != 200:
+        return []
+    
+    texts = []
+    for child in r.json().get("data", {}).get("children", []):
+        d = child.get("data", {})
+        text = f"{d.get('title', '')} {d.get('selftext', '')}".strip()
+        if text:
+            texts.append(text)
+    return texts
+
 async def get_reddit(symbol: str) -> list:
     """
     Fetch Reddit discussions for a symbol using Async PRAW.
     Falls back to JSON API if async PRAW unavailable.
+    All subreddit x term searches run concurrently.
     """
-    rc = reddit_client()
-    texts = []
+    rc = await get_reddit_client()
+    client = await get_http()  # Also sets up the Reddit concurrency limit
     base = symbol.split("-")[0].lower()
     terms = ALIASES.get(symbol, [symbol, base])
 
     if rc:
         # Use Async PRAW (proper async support)
         try:
-            for sub in SUBREDDITS:
-                try:
-                    subreddit = await rc.subreddit(sub)
-                    for query in terms:
-                        async for submission in subreddit.search(query, limit=15, sort="new"):
-                            text = f"{submission.title} {submission.selftext or ''}".strip()
-                            if text:
-                                texts.append(text)
-                except Exception as e:
-                    # Silent fail for individual subreddit errors
-                    pass
-            
-            await rc.close()
+            results = await asyncio.gather(
+                *[_collect(_search_praw(rc, sub, q), _REDDIT_SEM) for sub in SUBREDDITS for q in terms],
+                return_exceptions=True  # Silent fail for individual subreddit errors
+            )
+            texts = chain.from_iterable(r for r in results if isinstance(r, list))
             return dedupe_list(texts)[:60]
         except Exception as e:
             print(f"Async PRAW error: {e}")
-            try:
-                await rc.close()
-            except:
-                pass
 
     # Fallback: public JSON API (rate-limited)
-    async with httpx.AsyncClient() as client:
-        for sub in SUBREDDITS:
-            for query in terms:
-                url = f"https://www.reddit.com/r/{sub}/search.json?q={query}&restrict_sr=1&sort=new&t=day&limit=20"
-                try:
-                    r = await client.get(url, headers=UA, timeout=10)
-                    if r.status_code != 200:
-                        continue
-                    
-                    data = r.json().get("data", {}).get("children", [])
-                    for child in data:
-                        d = child.get("data", {})
-                        text = f"{d.get('title', '')} {d.get('selftext', '')}".strip()
-                        if text:
-                            texts.append(text)
-                except Exception:
-                    # Silent fail for rate limits
-                    continue
+    results = await asyncio.gather(
+        *[_search_json(client, sub, q) for sub in SUBREDDITS for q in terms],
+        return_exceptions=True  # Silent fail for rate limits
+    )
+    texts = chain.from_iterable(r for r in results if isinstance(r, list))
     
     return dedupe_list(texts)[:60]
 
 def dedupe_list(items: list[str]) -> list[str]:
     """Remove duplicates while preserving order."""
-    seen = set()
-    output = []
-    for item in items:
-        if item not in seen:
-            seen.add(item)
-            output.append(item)
-    return output
+    return list(dict.fromkeys(items))
 
 def get_prices(symbols: list, use_history: bool = False, intraday: bool = False) -> dict:
     """
     Fetch current prices using yfinance.
+    All symbols missing from the cache are fetched in one batched download.
     
     Args:
         intraday: If True, calculates same-day open-to-close change (like Google)
@@ -182,73 +240,121 @@ def get_prices(symbols: list, use_history: bool = False, intraday: bool = False)
     """
     output = {}
     debug_mode = os.getenv("DEBUG_MODE", "false").lower() == "true"
+    missing = []
     
     for sym in symbols:
+        cached = _PRICE_CACHE.get((sym, intraday))
+        if cached:
+            output[sym] = cached
+        else:
+            missing.append(sym)
+    
+    if not missing:
+        return output
+    
+    try:
+        df = yf.download(missing, period="5d", group_by="ticker", threads=True, progress=False)
+    except Exception as e:
+        print(f"Batch price fetch error: {e}")
+        df = None
+    
+    for sym in missing:
         try:
-            ticker = yf.Ticker(sym)
-            hist = ticker.history(period="5d")
-            
-            if len(hist) >= 1:
-                # Show recent history only in debug mode
-                if debug_mode:
-                    print(f"\n{sym} Recent History:")
-                    for idx in range(min(3, len(hist))):
-                        date = hist.index[-(idx+1)].strftime("%Y-%m-%d %a")
-                        close = hist['Close'].iloc[-(idx+1)]
-                        print(f"  {date}: ${close:.2f}")
-                
-                # Most recent trading day
-                latest = hist.iloc[-1]
-                price = float(latest['Close'])
-                trading_date = hist.index[-1].strftime("%Y-%m-%d %a")
-                
-                if intraday:
-                    # Same-day change: Open → Close (like Google)
-                    open_price = float(latest['Open'])
-                    change_pct = (price - open_price) / open_price
-                    prev = open_price
-                    comparison = f"Open: ${open_price:.2f} → Close: ${price:.2f}"
-                else:
-                    # Day-to-day change: Previous Close → Current Close
-                    if len(hist) >= 2:
-                        prev = float(hist.iloc[-2]['Close'])
-                    else:
-                        fi = ticker.fast_info
-                        prev = float(getattr(fi, "previous_close", price))
-                    
-                    change_pct = (price - prev) / prev
-                    comparison = f"Prev Close: ${prev:.2f} → Close: ${price:.2f}"
-                
-                if debug_mode:
-                    change_dollars = price - prev
-                    print(f"  → {comparison}")
-                    print(f"  → ${change_dollars:+.2f} ({change_pct*100:+.2f}%)\n")
-                
-                output[sym] = {
-                    "price": price,
-                    "prev": prev,
-                    "change_pct": change_pct,
-                    "trading_date": trading_date,
-                    "comparison": comparison,
-                    "is_live": hist.index[-1].date() == datetime.now().date()
-                }
+            hist = _symbol_history(df, sym)
+            if hist is not None and len(hist) >= 1:
+                entry = _price_from_history(sym, hist, intraday, debug_mode)
             else:
-                # Fallback to fast_info
-                fi = ticker.fast_info
-                price = getattr(fi, "last_price", None)
-                prev = getattr(fi, "previous_close", None)
-                
-                if price and prev:
-                    change_pct = (price - prev) / prev
-                    output[sym] = {
-                        "price": float(price),
-                        "prev": float(prev),
-                        "change_pct": float(change_pct),
-                        "trading_date": "unknown",
-                        "comparison": "unknown",
-                        "is_live": False
-                    }
+                # Symbol missing from the batch - fallback to fast_info
+                entry = _price_from_fast_info(sym)
         except Exception as e:
             print(f"Price fetch error for {sym}: {e}")
+            continue
+        
+        if entry:
+            _PRICE_CACHE[(sym, intraday)] = entry
+            output[sym] = entry
     
     return output
+
+def clear_price_cache():
+    """Drop all cached prices so the next get_prices call refetches."""
+    _PRICE_CACHE.clear()
+
+def _symbol_history(df, sym: str):
+    """Slice one symbol's rows out of a batched yf.download frame."""
+    if df is None or df.empty:
+        return None
+    
+    if getattr(df.columns, "nlevels", 1) > 1:
+        if sym not in df.columns.get_level_values(0):
+            return None
+        hist = df[sym]
+    else:
+        # Older yfinance returns flat columns for a single ticker
+        hist = df
+    
+    # Stocks and crypto trade on different days, so the shared index has gaps
+    return hist.dropna(subset=["Close"])
+
+def _price_from_history(sym: str, hist, intraday: bool, debug_mode: bool) -> dict:
+    """Build the price entry for one symbol from its recent daily history."""
+    # Show recent history only in debug mode
+    if debug_mode:
+        print(f"\n{sym} Recent History:")
+        for idx in range(min(3, len(hist))):
+            date = hist.index[-(idx+1)].strftime("%Y-%m-%d %a")
+            close = hist['Close'].iloc[-(idx+1)]
+            print(f"  {date}: ${close:.2f}")
+    
+    # Most recent trading day
+    price = float(hist['Close'].iloc[-1])
+    trading_date = hist.index[-1].strftime("%Y-%m-%d %a")
+    
+    if intraday:
+        # Same-day change: Open → Close (like Google)
+        open_price = float(hist['Open'].iloc[-1])
+        change_pct = (price - open_price) / open_price
+        prev = open_price
+        comparison = f"Open: ${open_price:.2f} → Close: ${price:.2f}"
+    else:
+        # Day-to-day change: Previous Close → Current Close
+        if len(hist) >= 2:
+            prev = float(hist['Close'].iloc[-2])
+        else:
+            fi = yf.Ticker(sym).fast_info
+            prev = float(getattr(fi, "previous_close", price))
+        
+        change_pct = (price - prev) / prev
+        comparison = f"Prev Close: ${prev:.2f} → Close: ${price:.2f}"
+    
+    if debug_mode:
+        change_dollars = price - prev
+        print(f"  → {comparison}")
+        print(f"  → ${change_dollars:+.2f} ({change_pct*100:+.2f}%)\n")
+    
+    return {
+        "price": price,
+        "prev": prev,
+        "change_pct": change_pct,
+        "trading_date": trading_date,
+        "comparison": comparison,
+        "is_live": hist.index[-1].date() == datetime.now().date()
+    }
+
+def _price_from_fast_info(sym: str):
+    """Fallback price entry from fast_info. Returns None if unavailable."""
+    fi = yf.Ticker(sym).fast_info
+    price = getattr(fi, "last_price", None)
+    prev = getattr(fi, "previous_close", None)
+    
+    if price and prev:
+        change_pct = (price - prev) / prev
+        return {
+            "price": float(price),
+            "prev": float(prev),
+            "change_pct": float(change_pct),
+            "trading_date": "unknown",
+            "comparison": "unknown",
+            "is_live": False
+        }
+    return None
@@ -3,33 +3,81 @@ Download pre-cached FinBERT model from cloud storage.
 Run this once before first use for faster startup.
 """
 import os
+import sys
+import hashlib
+import shutil
+import tarfile
 import requests
 from pathlib import Path
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 MODEL_URL = "https://your-cloud-storage-url.com/finbert_model.tar.gz"
 MODEL_CACHE = "./model_cache"
+MODEL_SHA256 = os.getenv("MODEL_SHA256", "")  # Expected archive checksum (optional)
+CHUNK_SIZE = 1 << 20  # 1 MB
+
+def _session() -> requests.Session:
+    """HTTP session that retries transient failures with backoff."""
+    session = requests.Session()
+    retry = Retry(total=5, backoff_factor=1, status_forcelist=(500, 502, 503, 504))
+    session.mount("https://", HTTPAdapter(pool_connections=1, max_retries=retry))
+    session.mount("http://", HTTPAdapter(pool_connections=1, max_retries=retry))
+    return session
 
 def download_model():
     """Download and extract pre-cached model."""
     cache_path = Path(MODEL_CACHE)
-    
+
     # Check if model already exists
     if cache_path.exists() and any(cache_path.iterdir()):
         print("✅ Model cache already exists!")
         return
-    
+
     print("📥 Downloading FinBERT model (~800MB)...")
     print("This is a one-time download and may take 2-5 minutes...")
-    
+
     cache_path.mkdir(exist_ok=True)
-    
-    # Download from cloud
-    response = requests.get(MODEL_URL, stream=True)
-    total_size = int(response.headers.get('content-length', 0))
-    
-    # Save and extract
-    # ... (add extraction logic)
-    
+    # Partial download lives next to the cache, so a failed run can't look like a cached model
+    tmp = cache_path.with_name(cache_path.name + ".tar.gz.part")
+
+    try:
+        # Stream to disk in 1 MB chunks, hashing as we go (never hold the archive in RAM)
+        h = hashlib.sha256()
+        downloaded = 0
+        with _session().get(MODEL_URL, stream=True, timeout=30) as response:
+            response.raise_for_status()
+            total_size = int(response.headers.get('content-length', 0))
+
+            with open(tmp, 'wb') as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    h.update(chunk)
+                    f.write(chunk)
+                    downloaded += len(chunk)
+                    if total_size:
+                        print(f"\r  {downloaded / total_size:6.1%} of {total_size >> 20} MB", end="", flush=True)
+        print()
+
+        # Reject bad downloads before touching the cache
+        if MODEL_SHA256 and h.hexdigest() != MODEL_SHA256.lower():
+            sys.exit(f"❌ Checksum mismatch: expected {MODEL_SHA256}, got {h.hexdigest()}")
+        if not MODEL_SHA256:
+            print(f"⚠️  MODEL_SHA256 not set; skipping verification (sha256={h.hexdigest()})")
+
+        # Extract
+        try:
+            with tarfile.open(tmp, 'r:gz') as tar:
+                if hasattr(tarfile, "data_filter"):
+                    tar.extractall(cache_path, filter="data")
+                else:
+                    tar.extractall(cache_path)
+        except BaseException:
+            # Don't leave a half-extracted cache that passes the exists check
+            shutil.rmtree(cache_path, ignore_errors=True)
+            raise
+    finally:
+        tmp.unlink(missing_ok=True)
+
     print("✅ Model downloaded successfully!")
 
 if __name__ == "__main__":
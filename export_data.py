@@ -1,24 +1,60 @@
 """
 Export latest analysis data for Alexa skill consumption.
 """
-import json
+import hashlib
+import orjson
 import os
+import time
 from datetime import datetime
+from typing import Optional
 
-def export_to_json(latest_analysis: dict, output_file: str = "latest_analysis.json"):
+# Fingerprint and time of the last write, to skip redundant rewrites
+_LAST_HASH: Optional[str] = None
+_LAST_WRITE = 0.0
+
+_JSON_OPTS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+
+# Per-symbol fields that change every cycle; left out of the change check
+_VOLATILE_FIELDS = frozenset({"last_updated"})
+
+def _fingerprint(latest_analysis: dict) -> str:
+    stable = {
+        symbol: {k: v for k, v in data.items() if k not in _VOLATILE_FIELDS}
+        for symbol, data in latest_analysis.items()
+    }
+    return hashlib.blake2b(orjson.dumps(stable, option=_JSON_OPTS | orjson.OPT_SORT_KEYS)).hexdigest()
+
+def export_to_json(latest_analysis: dict, output_file: str = "latest_analysis.json",
+                   min_interval: float = 5.0):
     """
     Export current analysis to JSON file.
     Alexa Lambda can read this from S3 or local storage.
+    Skips the write if the analysis is unchanged (ignoring per-symbol
+    last_updated) or the last write was under min_interval seconds ago.
+    Writes are atomic (temp file + rename).
+    The top-level timestamp therefore marks the last change, not the last
+    cycle; it stops advancing while the analysis is unchanged, so don't
+    read it as a "backend alive" signal.
     """
+    global _LAST_HASH, _LAST_WRITE
+    filepath = os.path.join(os.path.dirname(__file__), output_file)
+    
+    digest = _fingerprint(latest_analysis)
+    if digest == _LAST_HASH or time.monotonic() - _LAST_WRITE < min_interval:
+        return filepath
+    
     export_data = {
         "timestamp": datetime.utcnow().isoformat(),
         "symbols": latest_analysis
     }
     
-    filepath = os.path.join(os.path.dirname(__file__), output_file)
-    with open(filepath, 'w') as f:
-        json.dump(export_data, f, indent=2)
+    tmp_path = filepath + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(export_data, option=_JSON_OPTS | orjson.OPT_INDENT_2))
+    os.replace(tmp_path, filepath)
     
+    _LAST_HASH = digest
+    _LAST_WRITE = time.monotonic()
     print(f"📤 Exported analysis to {filepath}")
     return filepath
 
@@ -2,8 +2,12 @@
 Interactive CLI for testing Alexa queries without an actual Alexa device.
 Run this while app.py is running to query the latest analysis.
 """
-import json
 import os
+import re
+import collections
+import threading
+import orjson
+from cachetools import LRUCache
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -12,51 +16,109 @@ load_dotenv()
 from alexa_queries import get_news_summary, get_buy_sell_recommendation, get_detailed_analysis
 from chat_sambanova import have_conversation
 
-def load_latest_analysis():
-    """Load the latest analysis from the JSON file."""
-    filepath = os.path.join(os.path.dirname(__file__), "latest_analysis.json")
+ANALYSIS_FILE = os.path.join(os.path.dirname(__file__), "latest_analysis.json")
+
+def _read_analysis() -> dict:
+    with open(ANALYSIS_FILE, 'rb') as f:
+        return orjson.loads(f.read()).get("symbols", {})
+
+class AnalysisWatcher:
+    """
+    Polls latest_analysis.json on a background thread and keeps the newest
+    parse ready, so the input loop reads a snapshot without touching disk.
+    """
+    def __init__(self, interval: float = 0.5):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._data = None
+        self._mtime = None
+        self._failed_mtime = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="analysis-watcher", daemon=True)
     
-    if not os.path.exists(filepath):
-        return None
+    def start(self):
+        self._refresh()  # Have a snapshot before the first prompt
+        self._thread.start()
+        return self
     
-    try:
-        with open(filepath, 'r') as f:
-            data = json.load(f)
-            return data.get("symbols", {})
-    except Exception as e:
-        print(f"Error loading analysis: {e}")
-        return None
-
-def parse_symbol(user_input: str) -> str:
-    """Extract symbol from user input."""
-    symbols_map = {
-        "apple": "AAPL",
-        "microsoft": "MSFT",
-        "nvidia": "NVDA",
-        "bitcoin": "BTC-USD",
-        "btc": "BTC-USD",
-        "ethereum": "ETH-USD",
-        "eth": "ETH-USD",
-        "aapl": "AAPL",
-        "msft": "MSFT",
-        "nvda": "NVDA"
-    }
+    def stop(self):
+        self._stop.set()
     
-    user_lower = user_input.lower()
+    def snapshot(self):
+        """(analysis, mtime_ns) pair from the same load."""
+        with self._lock:
+            return self._data, self._mtime
     
-    for key, symbol in symbols_map.items():
-        if key in user_lower:
-            return symbol
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._refresh()
     
-    return None
+    def _refresh(self):
+        try:
+            mtime = os.stat(ANALYSIS_FILE).st_mtime_ns
+        except FileNotFoundError:
+            with self._lock:
+                self._data, self._mtime = None, None
+            return
+        
+        # Only re-parse a new version; a broken one waits for the next write
+        if mtime in (self._mtime, self._failed_mtime):
+            return
+        
+        try:
+            data = _read_analysis()
+        except Exception as e:
+            # Keep the previous snapshot; report each bad version once
+            self._failed_mtime = mtime
+            print(f"Error loading analysis: {e}")
+            return
+        
+        with self._lock:
+            self._data, self._mtime = data, mtime
 
-def handle_query(user_input: str, latest_analysis: dict, conversation_history: list) -> str:
+SYMBOLS_MAP = {
+    "apple": "AAPL",
+    "microsoft": "MSFT",
+    "nvidia": "NVDA",
+    "bitcoin": "BTC-USD",
+    "btc": "BTC-USD",
+    "ethereum": "ETH-USD",
+    "eth": "ETH-USD",
+    "aapl": "AAPL",
+    "msft": "MSFT",
+    "nvda": "NVDA"
+}
+
+# Longest names first so "bitcoin" wins over "btc"
+_SYMBOL_RE = re.compile(r"\b(" + "|".join(map(re.escape, sorted(SYMBOLS_MAP, key=len, reverse=True))) + r")\b")
+
+def parse_symbol(user_input: str) -> str:
+    """Extract symbol from user input (first whole-word match)."""
+    m = _SYMBOL_RE.search(user_input.lower())
+    return SYMBOLS_MAP[m.group(1)] if m else None
+
+# Previous turn only: (normalized question, analysis mtime) → reply. Any other
+# question depends on the conversation since, so it always goes to the LLM.
+_response_cache = LRUCache(maxsize=1)
+
+def handle_query(user_input: str, latest_analysis: dict, conversation_history: list, mtime_ns: int = None) -> str:
     """Process user query and return response using conversational AI."""
     if not latest_analysis:
+        _response_cache.clear()
         return "⚠️  No data available yet. Please wait for the backend to run at least one cycle."
     
+    key = (user_input.lower().strip(), mtime_ns)
+    if mtime_ns is not None and key in _response_cache:
+        return _response_cache[key]
+    
     # Use the LLM for full conversation
     response = have_conversation(conversation_history, latest_analysis, user_input)
+    
+    # Error/offline placeholders are bracketed; retry those next time
+    if mtime_ns is not None and not response.startswith("["):
+        _response_cache[key] = response
+    else:
+        _response_cache.clear()
     return response
 
 def main():
@@ -72,7 +134,9 @@ def main():
     print("\nType 'exit', 'quit', or 'clear' (to reset conversation) to stop.")
     print("=" * 70 + "\n")
     
-    conversation_history = []
+    # Last 10 exchanges (20 messages); older ones drop off on append
+    conversation_history = collections.deque(maxlen=20)
+    watcher = AnalysisWatcher().start()
     
     while True:
         try:
@@ -89,24 +153,21 @@ def main():
             
             # Clear conversation history
             if user_input.lower() in ["clear", "reset", "restart"]:
-                conversation_history = []
+                conversation_history.clear()
+                _response_cache.clear()
                 print("\n🔄 Conversation history cleared.\n")
                 continue
             
-            # Load latest analysis
-            latest_analysis = load_latest_analysis()
+            # Latest analysis, already loaded in the background while waiting for input
+            latest_analysis, mtime_ns = watcher.snapshot()
             
             # Process query with conversation context
-            response = handle_query(user_input, latest_analysis, conversation_history)
+            response = handle_query(user_input, latest_analysis, conversation_history, mtime_ns)
             
             # Add to conversation history
             conversation_history.append({"role": "user", "content": user_input})
             conversation_history.append({"role": "assistant", "content": response})
             
-            # Keep only last 10 exchanges (20 messages) for context
-            if len(conversation_history) > 20:
-                conversation_history = conversation_history[-20:]
-            
             print(f"\n🤖 Assistant: {response}\n")
         
         except KeyboardInterrupt:
@@ -114,6 +175,8 @@ def main():
             break
         except Exception as e:
             print(f"\n❌ Error: {e}\n")
+    
+    watcher.stop()
 
 if __name__ == "__main__":
     main()
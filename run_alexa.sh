@@ -0,0 +1,13 @@
+#!/bin/bash
+
+# Serve the Alexa endpoints with Gunicorn (one worker per CPU, 8 threads each)
+WORKERS=${WORKERS:-$(nproc 2>/dev/null || getconf _NPROCESSORS_ONLN 2>/dev/null || echo 2)}
+PORT=${PORT:-5000}
+
+if command -v gunicorn &> /dev/null; then
+    echo "🚀 Starting FinGalaxy Alexa server on port $PORT ($WORKERS workers)..."
+    exec gunicorn -w "$WORKERS" -k gthread --threads 8 -b "0.0.0.0:$PORT" wsgi:app
+else
+    echo "❌ Error: gunicorn not found. Install with: pip3 install gunicorn"
+    exit 1
+fi
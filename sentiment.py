@@ -1,12 +1,24 @@
+import re
 import math
+import time
+import queue
 import torch
-import collections
+import numpy as np
+import functools
+import threading
+from concurrent.futures import Future
 from transformers import AutoTokenizer, AutoModelForSequenceClassification
 
-def load_finbert(cache="./model_cache", model_name="yiyanghkust/finbert-tone", device=None):
+MAX_LENGTH = 256
+PAD_MULTIPLE = 32  # Batches pad to 32/64/.../256 tokens
+
+def load_finbert(cache="./model_cache", model_name="yiyanghkust/finbert-tone", device=None, half=True,
+                 jit=False):
     """
     Load FinBERT model and tokenizer.
     First run downloads from Hugging Face Hub automatically.
+    On CUDA the model is cast to float16 unless half=False.
+    With jit=True the model is traced and frozen to TorchScript.
     """
     try:
         # Try to load from local cache first
@@ -18,18 +30,22 @@ def load_finbert(cache="./model_cache", model_name="yiyanghkust/finbert-tone", d
         model = AutoModelForSequenceClassification.from_pretrained(
             model_name,
             cache_dir=cache,
-            local_files_only=True
+            local_files_only=True,
+            torchscript=jit
         )
     except:
         # First-time download from Hugging Face Hub
         print("📥 Downloading FinBERT model from Hugging Face (~800MB)...")
         print("⏱️  This is a one-time download and will take 2-5 minutes...")
         tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=cache)
-        model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache)
+        model = AutoModelForSequenceClassification.from_pretrained(model_name, cache_dir=cache, torchscript=jit)
         print("✅ Download complete! Model cached for future use.")
     
     if device:
         model = model.to(device)
+        # Inference is bandwidth bound; fp16 halves the bytes moved per forward pass
+        if half and torch.device(device).type == "cuda":
+            model = model.half()
     
     model.eval()
     
@@ -38,86 +54,384 @@ def load_finbert(cache="./model_cache", model_name="yiyanghkust/finbert-tone", d
     idx_pos = next(i for i, l in id2label.items() if l.startswith("pos"))
     idx_neg = next(i for i, l in id2label.items() if l.startswith("neg"))
     
+    if jit:
+        model = _trace_model(tokenizer, model, device)
+    
     return tokenizer, model, idx_pos, idx_neg
 
+# Process-wide FinBERT, loaded once on first use
+_FINBERT = None
+_FINBERT_DEVICE = None
+_FINBERT_LOCK = threading.Lock()
+
+def get_finbert(device=None, **kwargs):
+    """
+    Return the shared (tokenizer, model, idx_pos, idx_neg), loading it on first call.
+    Arguments only take effect on the first call.
+    """
+    global _FINBERT, _FINBERT_DEVICE
+    if _FINBERT is None:
+        with _FINBERT_LOCK:
+            if _FINBERT is None:
+                _FINBERT = load_finbert(device=device, **kwargs)
+                _FINBERT_DEVICE = device
+    return _FINBERT
+
+def _trace_model(tokenizer, model, device=None):
+    """
+    Trace to TorchScript and freeze, removing per-op Python dispatch.
+    A trace is only guaranteed at its example shape, so it is compared with
+    the eager model on a different batch size and width; if it doesn't match
+    (or fails), the eager model is returned instead.
+    """
+    def example(texts, length):
+        enc = tokenizer(texts, return_tensors="pt", padding="max_length", truncation=True, max_length=length)
+        return tuple(enc[k].to(device) if device else enc[k] for k in ("input_ids", "attention_mask"))
+    
+    with torch.no_grad():
+        traced = torch.jit.freeze(torch.jit.trace(model, example(["x"] * 2, MAX_LENGTH), strict=False))
+        check = example(["shares rally on earnings", "profits fall", "x"], PAD_MULTIPLE)
+        try:
+            ok = torch.allclose(traced(*check)[0].float(), model(*check)[0].float(), atol=1e-2)
+        except Exception:
+            ok = False
+    
+    if not ok:
+        print("⚠️  Traced FinBERT doesn't generalize across batch shapes; using the eager model")
+        return model
+    return traced
+
+def _logits(model, encoded):
+    """Forward pass for an eager HF model (with or without torchscript=True) or a traced one."""
+    if isinstance(model, torch.jit.ScriptModule):
+        return model(encoded["input_ids"], encoded["attention_mask"])[0]
+    out = model(**encoded)
+    # torchscript=True configs return plain tuples
+    return out[0] if isinstance(out, tuple) else out.logits
+
 def sigmoid(x):
     """Sigmoid function for confidence mapping."""
     return 1 / (1 + math.exp(-x))
 
-def batch_score_texts(texts, tokenizer, model, idx_pos, idx_neg, device=None):
+def _length_buckets(lengths, batch_size):
+    """
+    Group text indices by token length so each batch pads only to its own
+    max (rounded up to PAD_MULTIPLE), with at most batch_size per batch.
+    """
+    order = sorted(range(len(lengths)), key=lengths.__getitem__)
+    bucket, bucket_len = [], None
+    for i in order:
+        padded = -(-lengths[i] // PAD_MULTIPLE) * PAD_MULTIPLE
+        if bucket and (padded != bucket_len or len(bucket) == batch_size):
+            yield bucket
+            bucket = []
+        bucket.append(i)
+        bucket_len = padded
+    if bucket:
+        yield bucket
+
+def _encode(texts, tokenizer):
+    """
+    Truncated, unpadded token ids per text. Calls the Rust tokenizer's
+    encode_batch directly to skip the Python wrapper's per-call overhead.
+    """
+    fast = getattr(tokenizer, "backend_tokenizer", None)
+    if fast is None:
+        # Slow (pure-Python) tokenizer; FinBERT is single-segment, so skip token type ids
+        return tokenizer(texts, truncation=True, max_length=MAX_LENGTH,
+                         return_token_type_ids=False, return_attention_mask=False)["input_ids"]
+    
+    fast.enable_truncation(max_length=MAX_LENGTH)
+    fast.no_padding()
+    return [enc.ids for enc in fast.encode_batch(texts)]
+
+PINNED_ROWS = 64  # Staging buffers hold PINNED_ROWS x MAX_LENGTH tokens
+_pinned = threading.local()
+
+def _staging(rows, width):
+    """
+    Pinned (ids, mask) tensors for a rows x width batch, reused per thread
+    so CUDA copies can run async. Returns None if the batch doesn't fit.
+    """
+    n = rows * width
+    if n > PINNED_ROWS * MAX_LENGTH:
+        return None
+    buf = getattr(_pinned, "buf", None)
+    if buf is None:
+        buf = _pinned.buf = torch.empty((2, PINNED_ROWS * MAX_LENGTH), dtype=torch.long, pin_memory=True)
+    # Contiguous prefix of each flat buffer, viewed as the batch shape
+    return buf[0, :n].view(rows, width), buf[1, :n].view(rows, width)
+
+def _pad_batch(rows, pad_id, pinned=False):
     """
-    Score multiple texts in a single batch for efficiency.
-    Returns list of sentiment scores (positive - negative).
+    Pad id lists to the batch max (rounded up to PAD_MULTIPLE) in one numpy allocation.
+    With pinned=True the batch is written into this thread's pinned staging buffers.
+    """
+    width = min(MAX_LENGTH, -(-max(len(r) for r in rows) // PAD_MULTIPLE) * PAD_MULTIPLE)
+    staged = _staging(len(rows), width) if pinned else None
+    if staged is not None:
+        ids_t, mask_t = staged
+        ids, mask = ids_t.numpy(), mask_t.numpy()
+        ids.fill(pad_id)
+        mask.fill(0)
+    else:
+        ids = np.full((len(rows), width), pad_id, dtype=np.int64)
+        mask = np.zeros((len(rows), width), dtype=np.int64)
+        ids_t, mask_t = torch.from_numpy(ids), torch.from_numpy(mask)
+    for j, row in enumerate(rows):
+        ids[j, :len(row)] = row
+        mask[j, :len(row)] = 1
+    return {"input_ids": ids_t, "attention_mask": mask_t}
+
+def batch_score_texts(texts, tokenizer, model, idx_pos, idx_neg, device=None, batch_size=64,
+                      logit_score=False):
+    """
+    Score multiple texts in length-bucketed batches for efficiency.
+    Returns a 1-D CPU tensor of sentiment scores (positive - negative), in input order.
+    By default scores are P(pos) - P(neg); with logit_score=True they are
+    tanh(logit_pos - logit_neg), which skips the softmax but needs retuned thresholds.
     """
     if not texts:
-        return []
+        return torch.empty(0)
     
-    # Tokenize in batch
-    encoded = tokenizer(
-        texts,
-        return_tensors="pt",
-        truncation=True,
-        max_length=256,
-        padding=True
-    )
+    # Tokenize once without padding to learn each text's length
+    input_ids = _encode(texts, tokenizer)
+    return _score_ids(input_ids, tokenizer.pad_token_id or 0, model, idx_pos, idx_neg, device, batch_size,
+                      logit_score=logit_score)
+
+def _score_ids(input_ids, pad_id, model, idx_pos, idx_neg, device=None, batch_size=64, logit_score=False):
+    """Score already-tokenized texts; see batch_score_texts."""
+    scores = torch.empty(len(input_ids))
+    # Pinned staging only pays off for host→GPU copies
+    pinned = device is not None and torch.device(device).type == "cuda"
+    for bucket in _length_buckets([len(ids) for ids in input_ids], batch_size):
+        batch = _pad_batch([input_ids[i] for i in bucket], pad_id, pinned=pinned)
+        
+        if device:
+            batch = {k: v.to(device, non_blocking=True) for k, v in batch.items()}
+        
+        # Get predictions
+        with torch.inference_mode():
+            logits = _logits(model, batch).float()
+            if logit_score:
+                # Same sign as the probability difference, without the exp/sum kernel
+                batch_scores = (logits[:, idx_pos] - logits[:, idx_neg]).tanh()
+            else:
+                # Softmax in fp32 so half-precision logits can't saturate
+                probs = logits.softmax(dim=1)
+                batch_scores = probs[:, idx_pos] - probs[:, idx_neg]
+        
+        # Single device→host copy, then put scores back in input order.
+        # This syncs the stream, so the staging buffers are free for the next batch.
+        scores[torch.tensor(bucket)] = batch_scores.cpu()
     
-    if device:
-        encoded = {k: v.to(device) for k, v in encoded.items()}
+    return scores
+
+class DynamicBatcher:
+    """
+    Coalesces concurrent scoring requests into shared forward passes.
+    submit() only queues the texts; a single background thread tokenizes
+    them and flushes the queue once it holds max_tokens tokens or max_wait
+    seconds after the first request. Callers (e.g. the event loop) never pay
+    for tokenization, and the model is never driven by two threads at once.
+    Works from asyncio via asyncio.wrap_future.
+    """
+    def __init__(self, tokenizer, model, idx_pos, idx_neg, device=None,
+                 max_tokens=8192, max_wait=0.005, logit_score=False):
+        self._tokenizer = tokenizer
+        self._logit_score = logit_score
+        self._model_args = (model, idx_pos, idx_neg, device)
+        self._pad_id = tokenizer.pad_token_id or 0
+        self.max_tokens = max_tokens
+        self.max_wait = max_wait
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name="finbert-batcher", daemon=True)
+        self._thread.start()
     
-    # Get predictions
-    with torch.no_grad():
-        logits = model(**encoded).logits
-        probs = logits.softmax(dim=1)
+    def submit(self, texts) -> Future:
+        """Queue texts for scoring; the Future resolves to a 1-D CPU tensor."""
+        future = Future()
+        texts = list(texts)
+        if not texts:
+            future.set_result(torch.empty(0))
+            return future
+        self._queue.put((texts, future))
+        return future
     
-    # Calculate sentiment scores (pos - neg)
-    scores = []
-    for i in range(len(texts)):
-        score = float(probs[i, idx_pos]) - float(probs[i, idx_neg])
-        scores.append(score)
+    def score(self, texts):
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(texts).result()
     
-    return scores
+    def shutdown(self):
+        self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            
+            # Keep collecting until the token budget fills or the wait expires
+            deadline = time.monotonic() + self.max_wait
+            pending = []
+            tokens = self._take(item, pending)
+            stopping = False
+            while tokens < self.max_tokens:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                tokens += self._take(item, pending)
+            
+            self._flush(pending)
+            if stopping:
+                return
+    
+    def _take(self, item, pending):
+        """Tokenize a queued request onto pending; returns its token count."""
+        texts, future = item
+        if not future.set_running_or_notify_cancel():
+            return 0
+        try:
+            ids = _encode(texts, self._tokenizer)
+        except Exception as e:
+            future.set_exception(e)
+            return 0
+        pending.append((ids, future))
+        return sum(map(len, ids))
+    
+    def _flush(self, pending):
+        if not pending:
+            return
+        
+        try:
+            scores = _score_ids([row for ids, _ in pending for row in ids], self._pad_id, *self._model_args,
+                                logit_score=self._logit_score)
+        except Exception as e:
+            for _, future in pending:
+                future.set_exception(e)
+            return
+        
+        offset = 0
+        for ids, future in pending:
+            future.set_result(scores[offset:offset + len(ids)])
+            offset += len(ids)
+
+# Common English inflections, so "ETFs", "surged" and "dropping" count as their topic
+_SUFFIXES = ("s", "es", "d", "ed", "ing")
+_VOWELS = frozenset("aeiou")
+
+def _inflections(word: str) -> set:
+    """Surface forms of a vocab word: surge → surges/surged/surging, drop → dropped, rally → rallies."""
+    forms = {word}
+    forms.update(word + suffix for suffix in _SUFFIXES)
+    if word.endswith("e"):
+        forms.add(word[:-1] + "ing")
+    if len(word) >= 2 and word.endswith("y") and word[-2] not in _VOWELS:
+        forms.update((word[:-1] + "ies", word[:-1] + "ied"))
+    # Short consonant-vowel-consonant endings double the consonant (ban → banned)
+    if len(word) >= 3 and word[-1] not in "aeiouwxy" and word[-2] in _VOWELS and word[-3] not in _VOWELS:
+        forms.update((word + word[-1] + "ed", word + word[-1] + "ing"))
+    return forms
+
+@functools.lru_cache(maxsize=32)
+def _topic_matcher(vocab: tuple):
+    """
+    One word-bounded regex over every vocab entry and its inflections, plus
+    a map from each surface form back to its vocab index. None for no vocab.
+    """
+    forms = {}
+    for i, word in enumerate(vocab):
+        for form in _inflections(word):
+            forms.setdefault(form, i)  # Earlier vocab entries win collisions
+    if not forms:
+        return None
+    # Longest forms first so "surged" isn't cut short at "surge"
+    alternatives = "|".join(map(re.escape, sorted(forms, key=len, reverse=True)))
+    return re.compile(r"\b(?:" + alternatives + r")\b"), forms
 
 def explain_topics(texts: list[str], vocab: list[str]) -> dict:
     """
-    Extract topic frequencies from texts.
+    Extract topic frequencies from texts (whole words, allowing common inflections).
     Returns top 5 topics with normalized frequencies.
     """
-    counter = collections.Counter()
+    matcher = _topic_matcher(tuple(vocab))
+    if matcher is None:
+        return {}
+    topic_re, forms = matcher
+    hits = []
     
     for text in texts:
-        text_lower = text.lower()
-        for word in vocab:
-            if word in text_lower:
-                counter[word] += 1
+        # One regex scan per text; each topic counts once per text
+        hits.extend({forms[m] for m in topic_re.findall(text.lower())})
     
-    top_topics = counter.most_common(5)
-    total = sum(counter.values()) or 1
+    if not hits:
+        return {}
     
-    return {word: round(count / total, 3) for word, count in top_topics}
+    # Count per vocab index in one pass; stable sort keeps vocab order among ties
+    counts = np.bincount(hits, minlength=len(vocab))
+    total = int(counts.sum())
+    top = np.argsort(-counts, kind="stable")[:5]
+    return {vocab[i]: round(int(counts[i]) / total, 3) for i in top if counts[i] > 0}
 
-def analyze(symbol, news_titles, reddit_texts, tokenizer, model, idx_pos, idx_neg, 
+# Explainable features
+NEWS_VOCAB = [
+    "etf", "approval", "ban", "partnership", "surge", "drop",
+    "adoption", "guidance", "earnings", "revenue", "profit"
+]
+REDDIT_VOCAB = [
+    "halving", "bullish", "bearish", "regulation", "pump", "dump",
+    "inflation", "macro", "moon", "crash", "rally"
+]
+
+def analyze(symbol, news_titles, reddit_texts, tokenizer=None, model=None, idx_pos=None, idx_neg=None,
             buy=0.65, sell=0.35, device=None):
     """
     Analyze sentiment from news and Reddit data.
+    Uses the shared get_finbert() model unless a model is passed in.
     Returns comprehensive analysis with decision, confidence, and explainable features.
     """
-    # Batch score all texts
-    news_scores = batch_score_texts(news_titles, tokenizer, model, idx_pos, idx_neg, device)
-    reddit_scores = batch_score_texts(reddit_texts, tokenizer, model, idx_pos, idx_neg, device)
+    if model is None:
+        tokenizer, model, idx_pos, idx_neg = get_finbert(device=device)
+        device = _FINBERT_DEVICE
+    
+    # Score news and Reddit together in one forward pass, then split by source
+    combined = list(news_titles) + list(reddit_texts)
+    n_news = len(news_titles)
+    scores = batch_score_texts(combined, tokenizer, model, idx_pos, idx_neg, device)
+    news_scores, reddit_scores = scores[:n_news], scores[n_news:]
     
-    all_scores = news_scores + reddit_scores
+    return summarize_scores(news_titles, reddit_texts, news_scores, reddit_scores, buy=buy, sell=sell)
+
+def summarize_scores(news_titles, reddit_texts, news_scores, reddit_scores, buy=0.65, sell=0.35):
+    """
+    Turn per-text sentiment scores (tensors or lists) into a decision
+    with confidence and topics. Returns None if there is nothing to score.
+    """
+    all_scores = torch.cat([
+        torch.as_tensor(news_scores, dtype=torch.float32),
+        torch.as_tensor(reddit_scores, dtype=torch.float32),
+    ])
+    n = all_scores.numel()
     
-    if not all_scores:
+    if n == 0:
         return None
     
     # Calculate average sentiment
-    avg_sentiment = sum(all_scores) / len(all_scores)
+    avg_sentiment = all_scores.mean().item()
     
     # Base confidence from sentiment strength
     base_confidence = sigmoid(2.0 * avg_sentiment)
     
     # Reliability weighting based on volume (more sources = more reliable)
-    reliability = min(1.0, math.log(1 + len(all_scores)) / math.log(51))
+    reliability = min(1.0, math.log(1 + n) / math.log(51))
     final_confidence = 0.5 + (base_confidence - 0.5) * reliability
     
     # Make decision
@@ -127,26 +441,16 @@ def analyze(symbol, news_titles, reddit_texts, tokenizer, model, idx_pos, idx_ne
     elif final_confidence <= sell:
         decision = "SELL"
     
-    # Explainable features
-    news_vocab = [
-        "etf", "approval", "ban", "partnership", "surge", "drop",
-        "adoption", "guidance", "earnings", "revenue", "profit"
-    ]
-    reddit_vocab = [
-        "halving", "bullish", "bearish", "regulation", "pump", "dump",
-        "inflation", "macro", "moon", "crash", "rally"
-    ]
-    
     return {
         "decision": decision,
         "confidence": round(final_confidence * 100, 1),
         "news_count": len(news_titles),
         "reddit_count": len(reddit_texts),
-        "total_analyzed": len(all_scores),
-        "positive": sum(1 for s in all_scores if s > 0),
-        "negative": sum(1 for s in all_scores if s < 0),
+        "total_analyzed": n,
+        "positive": int((all_scores > 0).sum()),
+        "negative": int((all_scores < 0).sum()),
         "avg_sentiment": round(avg_sentiment, 3),
-        "news_topics": explain_topics(news_titles, news_vocab),
-        "reddit_topics": explain_topics(reddit_texts, reddit_vocab),
+        "news_topics": explain_topics(news_titles, NEWS_VOCAB) if news_titles else {},
+        "reddit_topics": explain_topics(reddit_texts, REDDIT_VOCAB) if reddit_texts else {},
         "sample_titles": news_titles[:3]
     }
@@ -0,0 +1,7 @@
+"""
+WSGI entry point for serving the Alexa endpoints with Gunicorn.
+Usage: gunicorn -k gthread --threads 8 -b 0.0.0.0:5000 wsgi:app
+"""
+from alexa_server import app
+
+__all__ = ["app"]